@@ -1,9 +1,15 @@
 import os
 import re
+import hashlib
+import copy
 import json
+import functools
+import warnings
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 import logging
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional, Tuple
 import parse as pr
 
@@ -11,36 +17,81 @@ import parse as pr
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Assuming your parse module is available
-try:
-    import parse as prds
-except ImportError:
-    logger.warning("Parse module not found. Please ensure parse.py is available.")
-    pr = None
+# Loaded sentence transformer models keyed on model name, shared across processors
+_MODEL_CACHE: Dict[str, SentenceTransformer] = {}
+
+# Arrays stored in the clause embeddings cache: the matrix plus what it was built from
+_EMBEDDINGS_CACHE_KEYS = {"embeddings", "model_name", "dim", "clauses_hash"}
+
+# Single pattern covering "6 months", "30-day", "2yrs", "waiting period of 24 months", ...
+_WAITING_PERIOD_RE = re.compile(r"(\d+)\s*-?\s*(day|month|year|yr)s?")
+
+# Number of top-scoring clauses considered for coverage decisions
+TOP_K_CLAUSES = 5
+
+# Words of 3+ characters, used to tokenize clauses and procedures
+_TOKEN_RE = re.compile(r"\w{3,}")
+
+# Phrases that mark a matched clause as an exclusion
+EXCLUSION_KEYWORDS = [
+    "not covered", "excluded", "not payable", "not eligible",
+    "except", "excluding", "does not cover", "shall not",
+    "not applicable", "not included"
+]
+
+# Single prefix-sharing alternation so all keywords are found in one scan
+_EXCLUSION_RE = re.compile(pr.trie_regex(EXCLUSION_KEYWORDS))
 
 class InsuranceClaimsProcessor:
     """
     A robust insurance claims processor that handles waiting periods and procedure coverage.
     """
     
-    def __init__(self, clauses_file: str = "all_clauses.json", model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, clauses_file: str = "all_clauses.json", model_name: str = "all-MiniLM-L6-v2",
+                 embeddings_file: str = "clause_embeddings.npz", query_cache_size: int = 1024):
         """
         Initialize the processor with clauses and model.
         
         Args:
             clauses_file: Path to JSON file containing all clauses
             model_name: Name of the sentence transformer model
+            embeddings_file: Path to the .npz cache of clause embeddings
+            query_cache_size: Maximum number of query embeddings kept in the LRU cache
         """
         self.clauses_file = clauses_file
         self.model_name = model_name
+        self.embeddings_file = embeddings_file
+        self.query_cache_size = query_cache_size
+        self._emb_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
         self.all_clauses = []
-        self.model = None
-        
-        # Load clauses and model
+        self.clause_embeddings: Optional[np.ndarray] = None
+        self.clause_norms: Optional[np.ndarray] = None
+        self.clause_lower: List[str] = []
+        self.clause_tokens: List[set] = []
+        self.clause_has_waiting_period: np.ndarray = np.zeros(0, dtype=bool)
+        self.clause_waiting_periods: List[List[int]] = []
+        self._model: Optional[SentenceTransformer] = None
+        self._model_load_failed = False
+        
+        # Load clauses and embeddings; the model itself is loaded on first use
         self._load_clauses()
-        self._load_model()
+        self._index_clauses()
         self._ensure_embeddings()
     
+    @property
+    def model(self) -> Optional[SentenceTransformer]:
+        """Sentence transformer model, loaded lazily and shared across instances."""
+        if self._model is None and not self._model_load_failed:
+            self._model = self._load_model()
+            self._model_load_failed = self._model is None
+        return self._model
+    
+    @model.setter
+    def model(self, value: Optional[SentenceTransformer]):
+        # Assigning None means "no model", so the getter must not lazily load one
+        self._model = value
+        self._model_load_failed = value is None
+    
     def _load_clauses(self):
         """Load clauses from JSON file with error handling."""
         try:
@@ -59,55 +110,192 @@ class InsuranceClaimsProcessor:
             logger.error(f"Error loading clauses: {e}")
             self.all_clauses = []
     
-    def _load_model(self):
-        """Load sentence transformer model with error handling."""
+    def _index_clauses(self):
+        """
+        Precompute per-clause text features once so per-query checks skip string work.
+        
+        Builds parallel per-clause arrays: lowercased text, word tokens, whether the
+        clause mentions a waiting period, and the waiting periods (in months) it states.
+        """
+        self.clause_lower = [clause.get("text", "").lower() for clause in self.all_clauses]
+        self.clause_tokens = [set(_TOKEN_RE.findall(text)) for text in self.clause_lower]
+        self.clause_has_waiting_period = np.array(
+            ["waiting period" in text for text in self.clause_lower], dtype=bool
+        )
+        self.clause_waiting_periods = [
+            self.extract_waiting_periods(text) if has_wp else []
+            for text, has_wp in zip(self.clause_lower, self.clause_has_waiting_period)
+        ]
+    
+    def _load_model(self) -> Optional[SentenceTransformer]:
+        """Load sentence transformer model (once per model name) with error handling."""
+        if self.model_name in _MODEL_CACHE:
+            return _MODEL_CACHE[self.model_name]
+        
         try:
-            self.model = SentenceTransformer(self.model_name, cache_folder="models")
-            logger.info("✅ Model loaded successfully")
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            model = SentenceTransformer(self.model_name, cache_folder="models", device=device)
+            if device == "cuda":
+                model = model.half()  # FP16 halves memory traffic on GPU
+            _MODEL_CACHE[self.model_name] = model
+            logger.info(f"✅ Model loaded successfully on {device}")
+            return model
         except Exception as e:
             logger.error(f"Error loading model: {e}")
-            self.model = None
+            return None
     
     def _ensure_embeddings(self):
-        """Compute embeddings if not present, with proper error handling."""
-        if not self.all_clauses or not self.model:
-            logger.warning("Cannot compute embeddings: missing clauses or model")
+        """Load cached clause embeddings or compute them, with proper error handling."""
+        if not self.all_clauses:
+            logger.warning("Cannot compute embeddings: missing clauses")
             return
         
         try:
-            # Check if embeddings exist
-            has_embeddings = all("embedding" in clause for clause in self.all_clauses)
+            # Reuse the cached embedding matrix only if it was built by this model
+            # from exactly these clause texts
+            clauses_hash = self._clauses_hash()
+            if os.path.exists(self.embeddings_file):
+                embeddings = None
+                with np.load(self.embeddings_file) as cached:
+                    if (
+                        _EMBEDDINGS_CACHE_KEYS <= set(cached.files)
+                        and str(cached["model_name"]) == self.model_name
+                        and str(cached["clauses_hash"]) == clauses_hash
+                    ):
+                        embeddings = cached["embeddings"]
+                        if embeddings.shape != (len(self.all_clauses), int(cached["dim"])):
+                            embeddings = None
+                if embeddings is not None:
+                    self._finalize_embeddings(embeddings)
+                    logger.info("✅ Embeddings already present")
+                    return
+                logger.info("Cached embeddings do not match model or clauses, recomputing")
             
-            if not has_embeddings:
-                logger.info("⏳ Computing embeddings for all clauses (first time)...")
-                
-                for i, clause in enumerate(self.all_clauses):
-                    if "text" not in clause:
-                        logger.warning(f"Clause {i} missing 'text' field, skipping")
-                        continue
-                        
-                    try:
-                        embedding = self.model.encode(clause["text"])
-                        clause["embedding"] = embedding.tolist()
-                    except Exception as e:
-                        logger.error(f"Error computing embedding for clause {i}: {e}")
-                        clause["embedding"] = []
-                
-                # Save embeddings
-                try:
-                    output_file = "all_clauses_with_embeddings.json"
-                    with open(output_file, "w", encoding="utf-8") as f:
-                        json.dump(self.all_clauses, f, ensure_ascii=False, indent=2)
-                    logger.info(f"✅ Saved clauses with embeddings to {output_file}")
-                except Exception as e:
-                    logger.error(f"Error saving embeddings: {e}")
-            else:
-                logger.info("✅ Embeddings already present")
+            if not self.model:
+                logger.warning("Cannot compute embeddings: missing model")
+                return
+            
+            logger.info("⏳ Computing embeddings for all clauses (first time)...")
+            
+            texts = []
+            idx = []
+            for i, clause in enumerate(self.all_clauses):
+                if "text" not in clause:
+                    logger.warning(f"Clause {i} missing 'text' field, skipping")
+                    continue
+                texts.append(clause["text"])
+                idx.append(i)
+            
+            # Encode all clauses in one batched call instead of one call per clause.
+            # Texts are sorted by length so each mini-batch pads to a similar size,
+            # then the outputs are scattered back into the original order.
+            try:
+                order = sorted(range(len(texts)), key=lambda j: len(texts[j].split()))
+                sorted_embeddings = self.model.encode(
+                    [texts[j] for j in order],
+                    batch_size=256 if self.model.device.type == "cuda" else 64,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=True
+                )
+            except Exception as e:
+                logger.error(f"Error computing clause embeddings: {e}")
+                return
+            
+            # Clauses without text keep an all-zero row so indices line up with all_clauses.
+            # FP16 output from a GPU model is upcast to float32 here.
+            embeddings = np.zeros(
+                (len(self.all_clauses), sorted_embeddings.shape[1]), dtype=np.float32
+            )
+            embeddings[[idx[j] for j in order]] = sorted_embeddings
+            self._finalize_embeddings(embeddings)
+            
+            # Save embeddings
+            try:
+                # Write through a file handle so np.savez keeps the configured name as-is
+                with open(self.embeddings_file, "wb") as f:
+                    np.savez(
+                        f,
+                        embeddings=embeddings,
+                        model_name=np.array(self.model_name),
+                        dim=np.array(embeddings.shape[1]),
+                        clauses_hash=np.array(clauses_hash),
+                    )
+                logger.info(f"✅ Saved clause embeddings to {self.embeddings_file}")
+            except Exception as e:
+                logger.error(f"Error saving embeddings: {e}")
                 
         except Exception as e:
             logger.error(f"Error in embedding process: {e}")
 
-    def extract_waiting_periods(self, text: str) -> List[int]:
+    def _clauses_hash(self) -> str:
+        """SHA-256 of all clause texts, in order, used to validate the embeddings cache."""
+        digest = hashlib.sha256()
+        for clause in self.all_clauses:
+            digest.update(clause.get("text", "").encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def _finalize_embeddings(self, embeddings: np.ndarray):
+        """
+        Cache clause norms and store L2-normalized clause embeddings.
+        
+        Norms are computed once here so later similarity checks are plain dot
+        products. All-zero rows (clauses without text) keep a norm of 0.
+        
+        Args:
+            embeddings: Clause embedding matrix of shape (num_clauses, dim)
+        """
+        # Keep everything in float32 so the similarity matmul never upcasts to float64
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.clause_norms = np.linalg.norm(embeddings, axis=1)
+        self.clause_embeddings = embeddings / (self.clause_norms[:, None] + np.float32(1e-8))
+        assert self.clause_embeddings.dtype == np.float32
+
+    def _encode_query(self, text: str) -> np.ndarray:
+        """
+        Encode a query string into a normalized embedding, using an LRU cache.
+        
+        Args:
+            text: Query text (e.g. a procedure name)
+            
+        Returns:
+            L2-normalized embedding vector
+        """
+        return self._encode_queries([text])[0]
+
+    def _encode_queries(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Encode several query strings, batching all cache misses into one model call.
+        
+        Args:
+            texts: Query texts (e.g. procedure names)
+            
+        Returns:
+            L2-normalized embedding vectors, in the same order as texts
+        """
+        keys = [" ".join(text.lower().split()) for text in texts]
+        unique_keys = list(dict.fromkeys(keys))
+        
+        lookup = {key: self._emb_cache[key] for key in unique_keys if key in self._emb_cache}
+        missing = [key for key in unique_keys if key not in lookup]
+        if missing:
+            embeddings = self.model.encode(
+                missing, convert_to_numpy=True, normalize_embeddings=True
+            ).astype(np.float32, copy=False)
+            lookup.update(zip(missing, embeddings))
+        
+        # Refresh recency for every key used and drop least recently used entries
+        for key in unique_keys:
+            self._emb_cache[key] = lookup[key]
+            self._emb_cache.move_to_end(key)
+        while len(self._emb_cache) > self.query_cache_size:
+            self._emb_cache.popitem(last=False)
+        
+        return [lookup[key] for key in keys]
+
+    @staticmethod
+    def extract_waiting_periods(text: str) -> List[int]:
         """
         Extract all waiting periods in months from clause text.
         
@@ -122,29 +310,10 @@ class InsuranceClaimsProcessor:
         
         periods = []
         
-        # Enhanced pattern to catch more variations
-        patterns = [
-            r"(\d+)\s*(day|days|month|months|year|years|yr|yrs)",
-            r"(\d+)[-]?(day|days|month|months|year|years|yr|yrs)",
-            r"waiting\s+period\s+(?:of\s+)?(\d+)\s*(day|days|month|months|year|years|yr|yrs)",
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text.lower())
-            for num_str, unit in matches:
-                try:
-                    num = int(num_str)
-                    if num <= 0:  # Skip invalid numbers
-                        continue
-                        
-                    if "year" in unit or "yr" in unit:
-                        periods.append(num * 12)
-                    elif "day" in unit:
-                        periods.append(max(1, round(num / 30)))
-                    else:  # month
-                        periods.append(num)
-                except ValueError:
-                    continue
+        for num_str, unit in _WAITING_PERIOD_RE.findall(text.lower()):
+            num = int(num_str)
+            if num > 0:  # Skip invalid numbers
+                periods.append(pr.duration_to_months(num, unit))
         
         return periods
 
@@ -159,20 +328,17 @@ class InsuranceClaimsProcessor:
         Returns:
             Similarity score between 0 and 1
         """
-        if not self.model or not text1 or not text2:
+        if not text1 or not text2 or not self.model:
             return 0.0
         
         try:
-            emb1 = self.model.encode(text1)
-            emb2 = self.model.encode(text2)
+            emb1, emb2 = self.model.encode([text1, text2], normalize_embeddings=True)
             
-            # Compute cosine similarity
-            similarity = np.dot(emb1, emb2) / (
-                np.linalg.norm(emb1) * np.linalg.norm(emb2) + 1e-8
-            )
+            # Embeddings are normalized, so the dot product is the cosine similarity
+            similarity = np.dot(emb1, emb2)
             
             # Ensure result is between 0 and 1
-            return max(0.0, min(1.0, float(similarity)))
+            return float(np.clip(similarity, 0.0, 1.0))
             
         except Exception as e:
             logger.error(f"Error computing similarity: {e}")
@@ -197,42 +363,43 @@ class InsuranceClaimsProcessor:
         procedure = parsed["procedure"].lower()
         
         # Extract key terms from procedure for better matching
-        procedure_terms = set(procedure.split())
+        # (3+ characters, avoiding matching very short terms)
+        procedure_terms = set(_TOKEN_RE.findall(procedure))
+        
+        # Encode the procedure once and score it against every clause up front,
+        # instead of re-encoding both sides for each clause inside the loop
+        sims = None
+        if self.clause_embeddings is not None and self.model:
+            try:
+                sims = self.clause_embeddings @ self._encode_query(procedure)
+                np.clip(sims, 0.0, 1.0, out=sims)
+            except Exception as e:
+                logger.warning(f"Error computing waiting period similarities: {e}")
         
         waiting_periods = []
         relevant_clauses = []
         
-        for clause in self.all_clauses:
-            if "text" not in clause:
-                continue
-                
-            clause_text = clause["text"].lower()
-            
-            # Check if clause mentions waiting period
-            if "waiting period" not in clause_text:
+        # Only clauses that mention a waiting period and state at least one
+        for i in np.flatnonzero(self.clause_has_waiting_period):
+            periods = self.clause_waiting_periods[i]
+            if not periods:
                 continue
             
             # Check if procedure is mentioned (flexible matching)
-            procedure_mentioned = False
-            for term in procedure_terms:
-                if len(term) > 2 and term in clause_text:  # Avoid matching very short terms
-                    procedure_mentioned = True
-                    break
+            procedure_mentioned = bool(procedure_terms & self.clause_tokens[i])
             
             # Also check semantic similarity for procedure matching
-            if not procedure_mentioned and self.model:
-                try:
-                    similarity = self.compute_similarity(procedure, clause_text)
-                    if similarity > 0.3:  # Lower threshold for waiting period checks
-                        procedure_mentioned = True
-                except Exception:
-                    pass
+            if not procedure_mentioned and sims is not None:
+                if sims[i] > 0.3:  # Lower threshold for waiting period checks
+                    procedure_mentioned = True
             
             if procedure_mentioned:
-                periods = self.extract_waiting_periods(clause_text)
-                if periods:
-                    waiting_periods.extend(periods)
-                    relevant_clauses.append(clause["text"])
+                # A period the policy already satisfies means the minimum can't exceed
+                # the policy duration, so no rejection is possible - stop scanning
+                if min(periods) <= policy_duration:
+                    return None
+                waiting_periods.extend(periods)
+                relevant_clauses.append(self.all_clauses[i]["text"])
         
         if waiting_periods:
             min_required = min(waiting_periods)
@@ -259,7 +426,8 @@ class InsuranceClaimsProcessor:
         Returns:
             Decision dictionary with approval/rejection
         """
-        if not parsed.get("procedure") or not self.all_clauses or not self.model:
+        if (not parsed.get("procedure") or not self.all_clauses or
+            self.clause_embeddings is None or not self.model):
             return {
                 "decision": "needs_review",
                 "justification": ["Cannot verify procedure coverage - missing information"],
@@ -268,32 +436,24 @@ class InsuranceClaimsProcessor:
             }
         
         procedure = parsed["procedure"]
-        best_match = None
-        best_score = 0.0
         
         # Find best matching clause using precomputed embeddings
         try:
-            proc_emb = self.model.encode(procedure)
+            proc_emb = self._encode_query(procedure)
             
-            for clause in self.all_clauses:
-                if "embedding" not in clause or not clause["embedding"]:
-                    continue
-                
-                try:
-                    clause_emb = np.array(clause["embedding"])
-                    
-                    # Compute cosine similarity
-                    similarity = np.dot(proc_emb, clause_emb) / (
-                        np.linalg.norm(proc_emb) * np.linalg.norm(clause_emb) + 1e-8
-                    )
-                    
-                    if similarity > best_score:
-                        best_score = similarity
-                        best_match = clause
-                        
-                except Exception as e:
-                    logger.warning(f"Error computing similarity for clause: {e}")
-                    continue
+            # Both sides are L2-normalized, so one matrix-vector product gives
+            # the cosine similarity against every clause
+            scores = self.clause_embeddings @ proc_emb
+            np.clip(scores, 0.0, 1.0, out=scores)
+            
+            # Partial sort (O(N)) to get the top-K candidate clauses, then order
+            # just those K by descending score
+            k = min(TOP_K_CLAUSES, len(scores))
+            top_idx = np.argpartition(-scores, k - 1)[:k]
+            top_idx = top_idx[np.argsort(-scores[top_idx])]
+            best_idx = int(top_idx[0])
+            best_score = float(scores[best_idx])
+            best_match = self.all_clauses[best_idx]
         
         except Exception as e:
             logger.error(f"Error in procedure coverage check: {e}")
@@ -304,28 +464,25 @@ class InsuranceClaimsProcessor:
                 "confidence": 0.0
             }
         
-        # Make decision based on best match
+        # Make decision based on the top matching clauses
         if best_match and best_score > 0.45:  # Reasonable similarity threshold
-            clause_text = best_match["text"].lower()
+            matched_idx = [int(i) for i in top_idx if scores[i] > 0.45]
             
-            # Check for exclusion keywords
-            exclusion_keywords = [
-                "not covered", "excluded", "not payable", "not eligible",
-                "except", "excluding", "does not cover", "shall not",
-                "not applicable", "not included"
+            # Check for exclusion keywords in any strongly matching clause
+            excluded_idx = [
+                i for i in matched_idx if _EXCLUSION_RE.search(self.clause_lower[i]) is not None
             ]
             
-            is_excluded = any(keyword in clause_text for keyword in exclusion_keywords)
-            
-            if is_excluded:
+            if excluded_idx:
+                excluded_score = float(scores[excluded_idx[0]])
                 return {
                     "decision": "rejected",
                     "justification": [
                         f"Procedure '{procedure}' appears to be excluded based on policy terms "
-                        f"(similarity: {best_score:.2f})"
+                        f"(similarity: {excluded_score:.2f})"
                     ],
-                    "clauses": [best_match["text"]],
-                    "confidence": min(0.9, best_score + 0.1)
+                    "clauses": [self.all_clauses[i]["text"] for i in excluded_idx],
+                    "confidence": min(0.9, excluded_score + 0.1)
                 }
             else:
                 return {
@@ -334,7 +491,7 @@ class InsuranceClaimsProcessor:
                         f"Procedure '{procedure}' is covered according to policy terms "
                         f"(similarity: {best_score:.2f})"
                     ],
-                    "clauses": [best_match["text"]],
+                    "clauses": [self.all_clauses[i]["text"] for i in matched_idx],
                     "confidence": best_score
                 }
         
@@ -387,18 +544,75 @@ class InsuranceClaimsProcessor:
         
         return coverage_decision
 
+    def make_decision_batch(self, parsed_queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Make decisions for several parsed queries at once.
+        
+        All procedures that are not cached yet are encoded in a single batched
+        model call up front, so the per-query checks only hit the embedding cache.
+        
+        Args:
+            parsed_queries: List of parsed query information
+            
+        Returns:
+            List of decision dictionaries, in the same order as parsed_queries
+        """
+        procedures = [parsed["procedure"] for parsed in parsed_queries
+                      if parsed and parsed.get("procedure")]
+        
+        if procedures and self.clause_embeddings is not None and self.model:
+            try:
+                self._encode_queries(procedures)
+            except Exception as e:
+                logger.warning(f"Error batch encoding procedures: {e}")
+        
+        return [self.make_decision(parsed) for parsed in parsed_queries]
+
 # Convenience functions for backward compatibility
+@functools.lru_cache(maxsize=1)
+def _default_processor() -> InsuranceClaimsProcessor:
+    """Shared processor for the legacy helpers, built once on first use."""
+    return InsuranceClaimsProcessor()
+
 def extract_waiting_periods(text: str) -> List[int]:
     """Legacy function - use InsuranceClaimsProcessor.extract_waiting_periods instead."""
-    processor = InsuranceClaimsProcessor()
-    return processor.extract_waiting_periods(text)
+    # Pure regex work: call the static method directly rather than building the
+    # default processor, which would load clauses and possibly compute embeddings
+    return InsuranceClaimsProcessor.extract_waiting_periods(text)
 
 def make_decision(parsed: Dict[str, Any], all_clauses: List[Dict], model) -> Dict[str, Any]:
-    """Legacy function - use InsuranceClaimsProcessor.make_decision instead."""
-    # Create a temporary processor instance
-    processor = InsuranceClaimsProcessor()
+    """
+    Legacy function - use InsuranceClaimsProcessor.make_decision instead.
+    
+    Swapping in external clauses bypasses the processor's precomputed embedding
+    cache, so clauses must carry inline "embedding" lists for coverage checks.
+    """
+    warnings.warn(
+        "make_decision(parsed, all_clauses, model) is deprecated; "
+        "use InsuranceClaimsProcessor.make_decision instead",
+        DeprecationWarning,
+        stacklevel=2
+    )
+    # Shallow copy of the shared processor so the singleton itself is left untouched
+    processor = copy.copy(_default_processor())
+    processor._emb_cache = OrderedDict()
     processor.all_clauses = all_clauses
+    processor._index_clauses()
     processor.model = model
+    # Legacy callers pass clauses with inline "embedding" lists. Clauses whose
+    # embedding is missing or empty get an all-zero row, which scores 0 and so is
+    # skipped, instead of discarding the whole matrix.
+    clause_embeddings = [clause.get("embedding") or [] for clause in all_clauses]
+    dim = max((len(embedding) for embedding in clause_embeddings), default=0)
+    if dim:
+        embeddings = np.zeros((len(clause_embeddings), dim), dtype=np.float32)
+        for i, embedding in enumerate(clause_embeddings):
+            if embedding:
+                embeddings[i] = embedding
+        processor._finalize_embeddings(embeddings)
+    else:
+        processor.clause_embeddings = None
+        processor.clause_norms = None
     return processor.make_decision(parsed)
 
 # Example usage and testing
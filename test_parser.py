@@ -36,6 +36,88 @@ def test_query_parser():
                 "gender": None,
                 "policy_duration_months": None
             }
+        },
+        # Test Case 4: Duration in days
+        {
+            "query": "30M eye surgery 60 days policy Chennai",
+            "expected": {
+                "age": 30,
+                "gender": "Male",
+                "procedure": "Eye Surgery",
+                "location": "Chennai",
+                "policy_duration_months": 2
+            }
+        },
+        # Test Case 5: Multi-word city ("new delhi" is matched ahead of "delhi")
+        {
+            "query": "45M kidney transplant 2 year policy new delhi",
+            "expected": {
+                "procedure": "Kidney Transplant",
+                "location": "Delhi",
+                "policy_duration_months": 24
+            }
+        },
+        # Test Case 6: Extra whitespace inside a multi-word city; keyword that
+        # extends another keyword ("transplant" -> "transplantation")
+        {
+            "query": "45M kidney transplantation 2 year policy new  delhi",
+            "expected": {
+                "procedure": "Kidney Transplantation",
+                "location": "Delhi"
+            }
+        },
+        # Test Case 7: Hyphenated multi-word city
+        {
+            "query": "35F liver transplant 1 year policy new-delhi",
+            "expected": {
+                "procedure": "Liver Transplant",
+                "location": "Delhi"
+            }
+        },
+        # Test Case 8: City name embedded in a longer word is not a city
+        {
+            "query": "dental treatment delhi2",
+            "expected": {
+                "procedure": "Dental Treatment",
+                "location": None
+            }
+        },
+        # Test Case 9: Keywords sharing a prefix ("therapy" / "therapeutic")
+        {
+            "query": "skin therapeutic Mumbai",
+            "expected": {
+                "procedure": "Skin Therapeutic",
+                "location": "Mumbai"
+            }
+        },
+        # Test Case 10: Keywords sharing a prefix ("operation" / "operative")
+        {
+            "query": "heart operative Pune",
+            "expected": {
+                "procedure": "Heart Operative",
+                "location": "Pune"
+            }
+        },
+        # Test Case 11: Several cities of equal length -> earliest in CITIES wins
+        {
+            "query": "knee surgery Agra to Pune",
+            "expected": {
+                "location": "Pune"
+            }
+        },
+        # Test Case 12: Longer city name wins over position in the query
+        {
+            "query": "Bangalore or new delhi",
+            "expected": {
+                "location": "Delhi"
+            }
+        },
+        # Test Case 13: "new-delhi" only matches "delhi", which ranks below "mumbai"
+        {
+            "query": "new-delhi kanpur mumbai",
+            "expected": {
+                "location": "Mumbai"
+            }
         }
     ]
     
@@ -52,5 +134,22 @@ def test_query_parser():
             else:
                 print(f"❌ {key}: FAIL (expected {expected_value}, got {result.get(key)})")
 
+def test_trie_regex():
+    """Test that the prefix-sharing keyword regex matches exactly the keyword list"""
+    
+    import re
+    
+    keyword_re = re.compile(rf"(?:{pr._KEYWORDS_ALT})")
+    near_misses = ["transplants", "transplanta", "therap", "operat", "surg", "re"]
+    
+    print("\n🧪 Testing Keyword Regex...")
+    failures = [kw for kw in pr._ALL_KEYWORDS if not keyword_re.fullmatch(kw)]
+    failures += [word for word in near_misses if keyword_re.fullmatch(word)]
+    if failures:
+        print(f"❌ keyword regex: FAIL ({failures})")
+    else:
+        print(f"✅ keyword regex: PASS ({len(pr._ALL_KEYWORDS)} keywords, {len(near_misses)} near misses)")
+
 if __name__ == "__main__":
-    test_query_parser()
\ No newline at end of file
+    test_query_parser()
+    test_trie_regex()
\ No newline at end of file
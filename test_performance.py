@@ -1,22 +1,36 @@
+import math
+import sys
 import time
-import statistics
+from itertools import islice, product
+import numpy as np
 import parse as pr
 from everything import InsuranceClaimsProcessor
 
+NS_PER_MS = 1_000_000
+NUM_QUERIES = 50  # Test first 50 queries
+
+# Factors combined into test queries: age, gender, procedure, duration, location.
+# Ages are pre-stringified so building a query never formats an int.
+QUERY_FACTORS = (
+    ["25", "35", "45", "55"],
+    ["M", "F"],
+    ["knee surgery", "heart surgery", "eye surgery"],
+    ["6 months", "1 year", "2 years"],
+    ["Mumbai", "Delhi", "Pune"],
+)
+
+def gen_queries():
+    """Lazily generate test queries from the Cartesian product of QUERY_FACTORS."""
+    return (
+        f"{age}{gender} {procedure} {duration} {location}"
+        for age, gender, procedure, duration, location in product(*QUERY_FACTORS)
+    )
+
 def test_performance():
     """Test system performance with multiple queries"""
     
-    # Generate test queries
-    test_queries = [
-        f"{age}{gender} {procedure} {duration} {location}"
-        for age in [25, 35, 45, 55]
-        for gender in ["M", "F"] 
-        for procedure in ["knee surgery", "heart surgery", "eye surgery"]
-        for duration in ["6 months", "1 year", "2 years"]
-        for location in ["Mumbai", "Delhi", "Pune"]
-    ]
-    
-    print(f"🚀 Performance Testing with {len(test_queries)} queries...")
+    total_queries = math.prod(len(factor) for factor in QUERY_FACTORS)
+    print(f"🚀 Performance Testing with {total_queries} queries...")
     
     try:
         processor = InsuranceClaimsProcessor()
@@ -26,79 +40,125 @@ def test_performance():
         return
     
     # Warm up (first query is usually slower)
-    pr.parse_query(test_queries[0])
-    processor.make_decision(pr.parse_query(test_queries[0]))
+    warm_query = next(gen_queries())
+    warm = pr.parse_query(warm_query)
+    processor.make_decision(warm)
     print("🔥 System warmed up")
     
-    # Performance testing
-    processing_times = []
-    parsing_times = []
-    decision_times = []
+    # Performance testing (pre-sized arrays of integer nanoseconds)
+    processing_times = np.empty(NUM_QUERIES, dtype=np.int64)
+    parsing_times = np.empty(NUM_QUERIES, dtype=np.int64)
+    decision_times = np.empty(NUM_QUERIES, dtype=np.int64)
+    
+    # Queries already parsed (and so served from the parse cache) are "warm"
+    seen = {warm_query}
+    cold_parses = np.zeros(NUM_QUERIES, dtype=bool)
     
     successful_queries = 0
     
-    for i, query in enumerate(test_queries[:50]):  # Test first 50 queries
-        try:
-            # Measure parsing time
-            start_parse = time.time()
+    # A single handler around the loop keeps exception setup out of each timed iteration
+    try:
+        for i, query in enumerate(islice(gen_queries(), NUM_QUERIES)):
+            cold = query not in seen
+            seen.add(query)
+            
+            # Measure parsing time (integer nanoseconds, converted to ms only for reporting)
+            start_parse = time.perf_counter_ns()
             parsed = pr.parse_query(query)
-            end_parse = time.time()
-            parse_time = (end_parse - start_parse) * 1000
+            end_parse = time.perf_counter_ns()
             
             # Measure decision time
-            start_decision = time.time()
+            start_decision = time.perf_counter_ns()
             decision = processor.make_decision(parsed)
-            end_decision = time.time()
-            decision_time = (end_decision - start_decision) * 1000
+            end_decision = time.perf_counter_ns()
             
-            total_time = parse_time + decision_time
-            
-            parsing_times.append(parse_time)
-            decision_times.append(decision_time)
-            processing_times.append(total_time)
+            parse_time = end_parse - start_parse
+            decision_time = end_decision - start_decision
+            parsing_times[successful_queries] = parse_time
+            decision_times[successful_queries] = decision_time
+            processing_times[successful_queries] = parse_time + decision_time
+            cold_parses[successful_queries] = cold
             successful_queries += 1
             
+            # Progress output happens only after both timed windows have closed
             if (i + 1) % 10 == 0:
                 print(f"Processed {i + 1} queries...")
                 
-        except Exception as e:
-            print(f"❌ Error with query {i+1}: {e}")
+    except Exception as e:
+        print(f"❌ Error with query {successful_queries + 1}: {e}")
+    
+    # Calculate statistics over the successful queries, in ms
+    parsing_times = parsing_times[:successful_queries] / NS_PER_MS
+    decision_times = decision_times[:successful_queries] / NS_PER_MS
+    processing_times = processing_times[:successful_queries] / NS_PER_MS
+    cold_parses = cold_parses[:successful_queries]
     
-    # Calculate statistics
-    if processing_times:
-        print("\n" + "="*50)
-        print("PERFORMANCE TEST RESULTS")
-        print("="*50)
+    if successful_queries:
+        # Build the report as one string and write it in a single call
+        out = []
+        out.append("\n" + "="*50)
+        out.append("PERFORMANCE TEST RESULTS")
+        out.append("="*50)
         
-        print(f"Successful Queries: {successful_queries}/{len(test_queries[:50])}")
-        print(f"Success Rate: {successful_queries/50*100:.1f}%")
+        out.append(f"Successful Queries: {successful_queries}/{NUM_QUERIES}")
+        out.append(f"Success Rate: {successful_queries/NUM_QUERIES*100:.1f}%")
         
-        print(f"\nParsing Performance:")
-        print(f"  Average: {statistics.mean(parsing_times):.1f}ms")
-        print(f"  Median: {statistics.median(parsing_times):.1f}ms")
-        print(f"  Min: {min(parsing_times):.1f}ms")
-        print(f"  Max: {max(parsing_times):.1f}ms")
+        out.append(f"\nParsing Performance:")
+        out.append(f"  Average: {parsing_times.mean():.1f}ms")
+        out.append(f"  Median: {np.median(parsing_times):.1f}ms")
+        out.append(f"  Min: {parsing_times.min():.1f}ms")
+        out.append(f"  Max: {parsing_times.max():.1f}ms")
+        for label, mask in (("Cold", cold_parses), ("Warm", ~cold_parses)):
+            if mask.any():
+                out.append(f"  {label} ({mask.sum()} queries): "
+                           f"Average {parsing_times[mask].mean():.3f}ms, "
+                           f"Min {parsing_times[mask].min():.3f}ms, "
+                           f"Max {parsing_times[mask].max():.3f}ms")
         
-        print(f"\nDecision Performance:")
-        print(f"  Average: {statistics.mean(decision_times):.1f}ms")
-        print(f"  Median: {statistics.median(decision_times):.1f}ms")
-        print(f"  Min: {min(decision_times):.1f}ms")
-        print(f"  Max: {max(decision_times):.1f}ms")
+        out.append(f"\nDecision Performance:")
+        out.append(f"  Average: {decision_times.mean():.1f}ms")
+        out.append(f"  Median: {np.median(decision_times):.1f}ms")
+        out.append(f"  Min: {decision_times.min():.1f}ms")
+        out.append(f"  Max: {decision_times.max():.1f}ms")
         
-        print(f"\nTotal Processing Performance:")
-        print(f"  Average: {statistics.mean(processing_times):.1f}ms")
-        print(f"  Median: {statistics.median(processing_times):.1f}ms")
-        print(f"  Min: {min(processing_times):.1f}ms")
-        print(f"  Max: {max(processing_times):.1f}ms")
+        out.append(f"\nTotal Processing Performance:")
+        out.append(f"  Average: {processing_times.mean():.1f}ms")
+        out.append(f"  Median: {np.median(processing_times):.1f}ms")
+        out.append(f"  Min: {processing_times.min():.1f}ms")
+        out.append(f"  Max: {processing_times.max():.1f}ms")
         
         # Performance benchmarks
-        avg_total = statistics.mean(processing_times)
+        avg_total = processing_times.mean()
         if avg_total < 300:
-            print("✅ Performance: EXCELLENT (<300ms)")
+            out.append("✅ Performance: EXCELLENT (<300ms)")
         elif avg_total < 500:
-            print("✅ Performance: GOOD (<500ms)")
+            out.append("✅ Performance: GOOD (<500ms)")
         else:
-            print("⚠️  Performance: NEEDS IMPROVEMENT (>500ms)")
+            out.append("⚠️  Performance: NEEDS IMPROVEMENT (>500ms)")
+        
+        sys.stdout.write("\n".join(out) + "\n")
+    
+    # Batch performance: decide all queries with one batched encode. The query
+    # embedding cache is cleared first so this times batched encoding, not cache
+    # hits left by the loop above. Parsing stays outside the timed window, as it
+    # has no batched form.
+    batch_queries = list(islice(gen_queries(), NUM_QUERIES))
+    try:
+        processor._emb_cache.clear()
+        parsed_batch = [pr.parse_query(query) for query in batch_queries]
+        
+        start_batch = time.perf_counter_ns()
+        processor.make_decision_batch(parsed_batch)
+        end_batch = time.perf_counter_ns()
+        
+        # Divides a total in ns down to ms per query
+        ns_per_query_ms = NS_PER_MS * len(batch_queries)
+        sys.stdout.write("\n".join([
+            f"\nBatch Decision Performance ({len(batch_queries)} queries, cold embedding cache):",
+            f"  Decision per query: {(end_batch - start_batch) / ns_per_query_ms:.1f}ms",
+        ]) + "\n")
+    except Exception as e:
+        print(f"❌ Batch error: {e}")
 
 if __name__ == "__main__":
     test_performance()
\ No newline at end of file